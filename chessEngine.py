@@ -1,8 +1,166 @@
 """
 This module implements the game state for a chess game, including the board setup,
 move generation, special moves (pawn promotion, en passant, castling), and move logging.
+
+Alongside the 8x8 string board the game state keeps one 64-bit bitboard per piece
+(bit r * 8 + c is set when that piece stands on square (r, c)) plus a flat mailbox of
+piece codes, which the move generators use instead of walking the string board.
 """
 
+import random
+
+# Piece codes used to index the bitboards and the mailbox. White pieces are 0-5, black 6-11.
+PIECES = ("wp", "wN", "wB", "wR", "wQ", "wK", "bp", "bN", "bB", "bR", "bQ", "bK")
+PIECE_CODES = {piece: code for code, piece in enumerate(PIECES)}
+EMPTY = 0xFF  # Mailbox value of an empty square.
+NO_SQUARE = 0xFF  # En passant square when no en passant capture is possible.
+
+# Castling rights are packed into one int, one bit per right.
+WKS = 1  # White kingside castling available.
+WQS = 2  # White queenside castling available.
+BKS = 4  # Black kingside castling available.
+BQS = 8  # Black queenside castling available.
+
+# Move generation emits moves packed into one int: start square in bits 0-5,
+# end square in bits 6-11, plus these flags. Only legal moves are turned into Move objects.
+EN_PASSANT_FLAG = 1 << 12
+CASTLE_FLAG = 1 << 13
+
+
+def buildLeaperAttacks(offsets):
+    """
+    Returns a 64-entry table of the squares reachable from each square with one of the given (dr, dc) jumps.
+    """
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        attacks = 0
+        for dr, dc in offsets:
+            if 0 <= r + dr < 8 and 0 <= c + dc < 8:
+                attacks |= 1 << ((r + dr) * 8 + c + dc)
+        table.append(attacks)
+    return table
+
+
+def buildRays(dr, dc):
+    """
+    Returns a 64-entry table of the squares a slider sees from each square on an empty board in direction (dr, dc).
+    """
+    table = []
+    for sq in range(64):
+        r, c = divmod(sq, 8)
+        ray = 0
+        r, c = r + dr, c + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            ray |= 1 << (r * 8 + c)
+            r, c = r + dr, c + dc
+        table.append(ray)
+    return table
+
+
+KNIGHT_ATTACKS = buildLeaperAttacks([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)])
+KING_ATTACKS = buildLeaperAttacks([(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1)])
+# Squares a pawn standing on each square captures on (white pawns move up the board, towards row 0).
+WHITE_PAWN_ATTACKS = buildLeaperAttacks([(-1, -1), (-1, 1)])
+BLACK_PAWN_ATTACKS = buildLeaperAttacks([(1, -1), (1, 1)])
+
+# File and rank masks for shifting a whole set of pawns at once.
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_3 = 0xFF << 40  # Row 5: white pawns that just left the starting row.
+RANK_6 = 0xFF << 16  # Row 2: black pawns that just left the starting row.
+
+# Rays paired with whether they point towards higher square indices, in which case the
+# nearest blocker is the lowest set bit; otherwise it is the highest.
+ROOK_RAYS = [(buildRays(dr, dc), dr * 8 + dc > 0) for dr, dc in [(1, 0), (-1, 0), (0, 1), (0, -1)]]
+BISHOP_RAYS = [(buildRays(dr, dc), dr * 8 + dc > 0) for dr, dc in [(1, 1), (1, -1), (-1, 1), (-1, -1)]]
+
+
+def slidingAttacks(sq, occupied, rays):
+    """
+    Returns the squares attacked from sq along the given rays, stopping at (and including) the first blocker.
+    """
+    attacks = 0
+    for table, positive in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if positive:
+                first = (blockers & -blockers).bit_length() - 1
+            else:
+                first = blockers.bit_length() - 1
+            ray ^= table[first]
+        attacks |= ray
+    return attacks
+
+
+def buildSliderAttacks(rays):
+    """
+    Precomputes slider attacks for every square and every arrangement of blockers.
+    Only blockers on the relevant squares (the rays minus their edge squares) can change the result,
+    so each square gets a mask of those squares and a table keyed by occupancy & mask.
+    This is the lookup magic bitboards provide; a dict keyed by the masked occupancy
+    plays the role of the magic multiply-and-shift index.
+    """
+    masks = []
+    tables = []
+    for sq in range(64):
+        mask = 0
+        for table, positive in rays:
+            ray = table[sq]
+            if ray:
+                edge = ray.bit_length() - 1 if positive else (ray & -ray).bit_length() - 1
+                mask |= ray ^ (1 << edge)
+        attacks = {}
+        # Walk every subset of the mask (Carry-Rippler trick), starting with the empty set.
+        subset = 0
+        while True:
+            attacks[subset] = slidingAttacks(sq, subset, rays)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(attacks)
+    return masks, tables
+
+
+# Rook attacks from sq are ROOK_ATTACKS[sq][occupied & ROOK_MASKS[sq]], likewise for bishops.
+ROOK_MASKS, ROOK_ATTACKS = buildSliderAttacks(ROOK_RAYS)
+BISHOP_MASKS, BISHOP_ATTACKS = buildSliderAttacks(BISHOP_RAYS)
+
+
+def buildBetween():
+    """
+    Returns a 64x64 table of the squares strictly between two squares on a shared rank, file or diagonal
+    (0 for squares that don't share one).
+    """
+    between = [[0] * 64 for _ in range(64)]
+    for table, positive in ROOK_RAYS + BISHOP_RAYS:
+        for sq in range(64):
+            targets = table[sq]
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                # The ray from sq minus the ray continuing past the target, minus the target itself.
+                between[sq][target.bit_length() - 1] = table[sq] ^ table[target.bit_length() - 1] ^ target
+    return between
+
+
+BETWEEN = buildBetween()
+
+# Zobrist keys: the position hash is the XOR of one random key per (piece, square) on the board,
+# plus keys for black to move, the castling rights and the en passant file. A fixed seed keeps
+# hashes identical between runs.
+_zobristRandom = random.Random(2024)
+Z_PIECE = [[_zobristRandom.getrandbits(64) for sq in range(64)] for code in range(12)]
+Z_BLACK_TO_MOVE = _zobristRandom.getrandbits(64)
+Z_CASTLE = [_zobristRandom.getrandbits(64) for rights in range(16)]
+Z_EP_FILE = [_zobristRandom.getrandbits(64) for col in range(8)]
+
+# Move objects shared by all games, keyed by packed move and the codes of the moved and captured pieces.
+MOVE_CACHE = {}
+
+
 class GameState():
     def __init__(self):
         # Initialize the chess board as an 8x8 list.
@@ -18,16 +176,6 @@ class GameState():
             ["wR", "wN", "wB", "wQ", "wK", "wB", "wN", "wR"]
         ]
         
-        # Map piece type to its move generation function.
-        self.moveFunctions = {
-            'p': self.getPawnMoves,
-            'R': self.getRookMoves,
-            'K': self.getKingMoves,
-            'Q': self.getQueenMoves,
-            'B': self.getBishopMoves,
-            'N': self.getKnightMoves
-        }
-        
         # True if it is White's turn; False for Black.
         self.whiteToMove = True
         
@@ -42,18 +190,74 @@ class GameState():
         self.checkMate = True
         self.staleMate = False
         
-        # Track square available for en passant capture.
-        self.enpassantPossible = ()
+        # Track square (r * 8 + c) available for en passant capture.
+        self.enpassantSq = NO_SQUARE
+        # En passant square before each move in the move log, one byte per move.
+        self.enpassantLog = bytearray()
         
         # Initial castling rights.
-        self.currentCastlingRights = CastlingRights(True, True, True, True)
-        # Log of castling rights. We create a new deep copy so that later changes don't affect this log.
-        self.CastleRightLog = [CastlingRights(
-            self.currentCastlingRights.wks,
-            self.currentCastlingRights.bks,
-            self.currentCastlingRights.wqs,
-            self.currentCastlingRights.bqs
-        )]
+        self.castleRights = WKS | WQS | BKS | BQS
+        # Castling rights before each move in the move log, one byte per move.
+        self.castleRightsLog = bytearray()
+
+        # Bitboards indexed by piece code, per-color occupancy, and a flat mailbox of piece codes.
+        self.bb = [0] * 12
+        self.mailbox = bytearray([EMPTY]) * 64
+        for r in range(8):
+            for c in range(8):
+                if self.board[r][c] != "--":
+                    code = PIECE_CODES[self.board[r][c]]
+                    self.bb[code] |= 1 << (r * 8 + c)
+                    self.mailbox[r * 8 + c] = code
+        self.occWhite = self.bb[0] | self.bb[1] | self.bb[2] | self.bb[3] | self.bb[4] | self.bb[5]
+        self.occBlack = self.bb[6] | self.bb[7] | self.bb[8] | self.bb[9] | self.bb[10] | self.bb[11]
+        self.occAll = self.occWhite | self.occBlack
+
+        # Zobrist hash of the position, updated incrementally as moves are made and undone.
+        self.zobrist = self.computeZobrist()
+
+    def computeZobrist(self):
+        """
+        Computes the Zobrist hash of the current position from scratch.
+        """
+        h = 0
+        for sq in range(64):
+            if self.mailbox[sq] != EMPTY:
+                h ^= Z_PIECE[self.mailbox[sq]][sq]
+        if not self.whiteToMove:
+            h ^= Z_BLACK_TO_MOVE
+        h ^= Z_CASTLE[self.castleRights]
+        if self.enpassantSq != NO_SQUARE:
+            h ^= Z_EP_FILE[self.enpassantSq & 7]
+        return h
+
+    def setSquare(self, r, c, piece):
+        """
+        Places piece (or "--" to empty it) on square (r, c), keeping the bitboards, mailbox and hash in sync.
+        """
+        sq = r * 8 + c
+        bit = 1 << sq
+        old = self.mailbox[sq]
+        if old != EMPTY:
+            self.bb[old] ^= bit
+            self.zobrist ^= Z_PIECE[old][sq]
+            if old < 6:
+                self.occWhite ^= bit
+            else:
+                self.occBlack ^= bit
+        if piece == "--":
+            self.mailbox[sq] = EMPTY
+        else:
+            code = PIECE_CODES[piece]
+            self.bb[code] ^= bit
+            self.mailbox[sq] = code
+            self.zobrist ^= Z_PIECE[code][sq]
+            if code < 6:
+                self.occWhite ^= bit
+            else:
+                self.occBlack ^= bit
+        self.occAll = self.occWhite | self.occBlack
+        self.board[r][c] = piece
 
     def makeMove(self, move):
         """
@@ -62,29 +266,29 @@ class GameState():
         and logs the move.
         """
         # Empty the starting square.
-        self.board[move.startRow][move.startCol] = "--"
+        self.setSquare(move.startRow, move.startCol, "--")
         
         # Handle pawn promotion.
         if move.isPawnPromotion:
-            self.board[move.endRow][move.endCol] = move.pieceMoved[0] + move.promotionChoice
+            self.setSquare(move.endRow, move.endCol, move.pieceMoved[0] + move.promotionChoice)
         else:
-            self.board[move.endRow][move.endCol] = move.pieceMoved
+            self.setSquare(move.endRow, move.endCol, move.pieceMoved)
 
         # En passant capture.
         if move.isEnPassantMove:
             if move.pieceMoved == "wp":
-                self.board[move.endRow + 1][move.endCol] = "--"
+                self.setSquare(move.endRow + 1, move.endCol, "--")
             else:
-                self.board[move.endRow - 1][move.endCol] = "--"
+                self.setSquare(move.endRow - 1, move.endCol, "--")
 
         # Handle castling move: move the rook accordingly.
         if move.isCastleMove:
             if move.endCol - move.startCol == 2:  # kingside castle
-                self.board[move.endRow][move.endCol-1] = self.board[move.endRow][move.endCol+1]
-                self.board[move.endRow][move.endCol+1] = "--"
+                self.setSquare(move.endRow, move.endCol-1, self.board[move.endRow][move.endCol+1])
+                self.setSquare(move.endRow, move.endCol+1, "--")
             else:  # queenside castle
-                self.board[move.endRow][move.endCol+1] = self.board[move.endRow][move.endCol-2]
-                self.board[move.endRow][move.endCol-2] = "--"
+                self.setSquare(move.endRow, move.endCol+1, self.board[move.endRow][move.endCol-2])
+                self.setSquare(move.endRow, move.endCol-2, "--")
 
         # Log the move.
         self.movelog.append(move)
@@ -98,24 +302,24 @@ class GameState():
         elif move.pieceMoved == "bK":
             self.blackKingLocation = (move.endRow, move.endCol)
 
-        # Store current en passant state for later restoration.
-        move.enpassantPossibleBefore = self.enpassantPossible
+        # Log the current en passant state for later restoration.
+        self.enpassantLog.append(self.enpassantSq)
         # Update the en passant square if a pawn advances two squares.
-        if move.pieceMoved[1] == 'p' and abs(move.startRow - move.endRow) == 2:
-            self.enpassantPossible = ((move.startRow + move.endRow) // 2, move.endCol)
+        if move.isTwoPawnAdvance:
+            self.enpassantSq = (move.startRow + move.endRow) // 2 * 8 + move.endCol
         else:
-            self.enpassantPossible = ()
+            self.enpassantSq = NO_SQUARE
 
-        # Update castling rights based on the move.
+        # Log the castling rights, then update them based on the move.
+        self.castleRightsLog.append(self.castleRights)
         self.updateCastleRights(move)
-        
-        # Append a deep copy of castling rights to the log.
-        self.CastleRightLog.append(CastlingRights(
-            self.currentCastlingRights.wks,
-            self.currentCastlingRights.bks,
-            self.currentCastlingRights.wqs,
-            self.currentCastlingRights.bqs
-        ))
+
+        # Piece keys were updated square by square; now the side to move, en passant file and castling rights.
+        self.zobrist ^= Z_BLACK_TO_MOVE ^ Z_CASTLE[self.castleRightsLog[-1]] ^ Z_CASTLE[self.castleRights]
+        if self.enpassantLog[-1] != NO_SQUARE:
+            self.zobrist ^= Z_EP_FILE[self.enpassantLog[-1] & 7]
+        if self.enpassantSq != NO_SQUARE:
+            self.zobrist ^= Z_EP_FILE[self.enpassantSq & 7]
 
     def undoMove(self):
         """
@@ -127,33 +331,37 @@ class GameState():
             move = self.movelog.pop()
             
             # Restore the moved piece to its starting square.
-            self.board[move.startRow][move.startCol] = move.pieceMoved
+            self.setSquare(move.startRow, move.startCol, move.pieceMoved)
 
             # Restore captured piece (or handle pawn promotion undo).
             if move.isPawnPromotion:
-                self.board[move.endRow][move.endCol] = move.pieceCaptured
+                self.setSquare(move.endRow, move.endCol, move.pieceCaptured)
             else:
-                self.board[move.endRow][move.endCol] = move.pieceCaptured
+                self.setSquare(move.endRow, move.endCol, move.pieceCaptured)
 
             # Undo en passant move.
             if move.isEnPassantMove:
-                self.board[move.endRow][move.endCol] = "--"
+                self.setSquare(move.endRow, move.endCol, "--")
                 if move.pieceMoved == "wp":
-                    self.board[move.endRow + 1][move.endCol] = "bp"
+                    self.setSquare(move.endRow + 1, move.endCol, "bp")
                 else:
-                    self.board[move.endRow - 1][move.endCol] = "wp"
+                    self.setSquare(move.endRow - 1, move.endCol, "wp")
 
             # If the move was a castling move, return the rook to its original square.
             if move.isCastleMove:
                 if move.endCol - move.startCol == 2:  # kingside castle
-                    self.board[move.endRow][move.endCol+1] = self.board[move.endRow][move.endCol-1]
-                    self.board[move.endRow][move.endCol-1] = "--"
+                    self.setSquare(move.endRow, move.endCol+1, self.board[move.endRow][move.endCol-1])
+                    self.setSquare(move.endRow, move.endCol-1, "--")
                 else:  # queenside castle
-                    self.board[move.endRow][move.endCol-2] = self.board[move.endRow][move.endCol+1]
-                    self.board[move.endRow][move.endCol+1] = "--"
+                    self.setSquare(move.endRow, move.endCol-2, self.board[move.endRow][move.endCol+1])
+                    self.setSquare(move.endRow, move.endCol+1, "--")
 
             # Restore the previous en passant state.
-            self.enpassantPossible = move.enpassantPossibleBefore
+            if self.enpassantSq != NO_SQUARE:
+                self.zobrist ^= Z_EP_FILE[self.enpassantSq & 7]
+            self.enpassantSq = self.enpassantLog.pop()
+            if self.enpassantSq != NO_SQUARE:
+                self.zobrist ^= Z_EP_FILE[self.enpassantSq & 7]
 
             # Switch turn back.
             self.whiteToMove = not self.whiteToMove
@@ -164,16 +372,10 @@ class GameState():
             elif move.pieceMoved == "bK":
                 self.blackKingLocation = (move.startRow, move.startCol)
 
-            # Undo castling rights: remove the last log entry and revert to a new copy of the previous state.
-            self.CastleRightLog.pop()
-            castleRights = self.CastleRightLog[-1]
-            # Create a brand new object to avoid reference issues
-            self.currentCastlingRights = CastlingRights(
-                castleRights.wks,
-                castleRights.bks, 
-                castleRights.wqs, 
-                castleRights.bqs
-            )
+            # Restore the castling rights from before the move.
+            self.zobrist ^= Z_BLACK_TO_MOVE ^ Z_CASTLE[self.castleRights]
+            self.castleRights = self.castleRightsLog.pop()
+            self.zobrist ^= Z_CASTLE[self.castleRights]
 
             # When we undo move we cannot be in checkmate / stalemate
             self.checkMate = False
@@ -186,78 +388,93 @@ class GameState():
         """
         # If king moves, remove both castling rights for that side
         if move.pieceMoved == "wK":
-            self.currentCastlingRights.wks = False
-            self.currentCastlingRights.wqs = False
+            self.castleRights &= ~(WKS | WQS)
         elif move.pieceMoved == "bK":
-            self.currentCastlingRights.bks = False
-            self.currentCastlingRights.bqs = False
+            self.castleRights &= ~(BKS | BQS)
         
         # If rook moves, remove corresponding castling right
         elif move.pieceMoved == "wR":
             if move.startRow == 7:
                 if move.startCol == 0:
-                    self.currentCastlingRights.wqs = False
+                    self.castleRights &= ~WQS
                 elif move.startCol == 7:
-                    self.currentCastlingRights.wks = False
+                    self.castleRights &= ~WKS
         elif move.pieceMoved == "bR":
             if move.startRow == 0:
                 if move.startCol == 0:
-                    self.currentCastlingRights.bqs = False
+                    self.castleRights &= ~BQS
                 elif move.startCol == 7:
-                    self.currentCastlingRights.bks = False
+                    self.castleRights &= ~BKS
 
         # Also update castling rights if a rook is captured from its original square.
         if move.pieceCaptured == "wR":
             if move.endRow == 7:
                 if move.endCol == 0:
-                    self.currentCastlingRights.wqs = False
+                    self.castleRights &= ~WQS
                 elif move.endCol == 7:
-                    self.currentCastlingRights.wks = False
+                    self.castleRights &= ~WKS
         elif move.pieceCaptured == "bR":
             if move.endRow == 0:
                 if move.endCol == 0:
-                    self.currentCastlingRights.bqs = False
+                    self.castleRights &= ~BQS
                 elif move.endCol == 7:
-                    self.currentCastlingRights.bks = False
+                    self.castleRights &= ~BKS
 
     def getValidMoves(self):
         """
         Returns a list of all valid moves by considering check conditions.
-        Generates all possible moves (including castling), makes each move to test for check,
-        and then undoes the move.
         """
-        # Save the current state
-        tempEnpassantPossible = self.enpassantPossible
-        
-        # Create a brand new copy of castling rights to avoid reference issues
-        tempCastleRights = CastlingRights(
-            self.currentCastlingRights.wks,
-            self.currentCastlingRights.bks,
-            self.currentCastlingRights.wqs,
-            self.currentCastlingRights.bqs
-        )
-        
-        # Generate all potential moves without checking for check
-        moves = self.getAllPossibleMovees()
+        return [self.unpackMove(packed) for packed in self.getPackedValidMoves()]
 
-        # Check for castling possibilities
+    def getLoudMoves(self):
+        """
+        Returns the valid captures (en passant included) and promotions only, for the AI's quiescence search.
+        The quiet moves are still generated, as packed moves, so the checkMate and staleMate flags
+        are set just as getValidMoves sets them, but they are never unpacked into Move objects.
+        """
+        mailbox = self.mailbox
+        return [self.unpackMove(packed) for packed in self.getPackedValidMoves()
+                if mailbox[(packed >> 6) & 63] != EMPTY or packed & EN_PASSANT_FLAG
+                or (mailbox[packed & 63] % 6 == 0 and ((packed >> 9) & 7) in (0, 7))]
+
+    def getPackedValidMoves(self):
+        """
+        Returns all valid moves as packed moves and sets the checkMate and staleMate flags.
+        Works out the checks and pins against the king first, so the generators can restrict
+        every piece to the squares it may legally reach and only legal moves are produced.
+        """
         if self.whiteToMove:
-            self.getCastleMoves(self.whiteKingLocation[0], self.whiteKingLocation[1], moves)
+            kingRow, kingCol = self.whiteKingLocation
+            own = self.occWhite
         else:
-            self.getCastleMoves(self.blackKingLocation[0], self.blackKingLocation[1], moves)
+            kingRow, kingCol = self.blackKingLocation
+            own = self.occBlack
+        kingSq = kingRow * 8 + kingCol
+        checkers = self.attackersTo(kingSq, not self.whiteToMove)
+
+        packedMoves = []
+        # In double check only the king may move.
+        if not checkers & (checkers - 1):
+            if checkers:
+                # Capture the checker or block the line between it and the king.
+                allowed = checkers | BETWEEN[kingSq][checkers.bit_length() - 1]
+            else:
+                allowed = ~own
+            pinned, pinRays = self.getPins(kingSq)
+            self.getPieceMoves(packedMoves, allowed, pinned, pinRays)
 
-        # Filter out moves that leave own king in check
-        for i in range(len(moves) - 1, -1, -1):
-            self.makeMove(moves[i])
-            self.whiteToMove = not self.whiteToMove
-            if self.inCheck():
-                moves.remove(moves[i])
-            self.whiteToMove = not self.whiteToMove
-            self.undoMove()
+        # The king may not step onto an attacked square. It is lifted off the board first,
+        # so that it can't hide from a slider on the square behind it.
+        attacked = self.attackedSquares(not self.whiteToMove, self.occAll ^ (1 << kingSq))
+        self.getKingMoves(kingRow, kingCol, packedMoves, ~own & ~attacked)
+
+        # Check for castling possibilities
+        if not checkers:
+            self.getCastleMoves(kingRow, kingCol, packedMoves, attacked)
 
         # Set game state flags
-        if len(moves) == 0:
-            if self.inCheck():
+        if len(packedMoves) == 0:
+            if checkers:
                 self.checkMate = True
             else:
                 self.staleMate = True
@@ -265,205 +482,361 @@ class GameState():
             self.checkMate = False
             self.staleMate = False
 
-        # Restore the saved state
-        self.enpassantPossible = tempEnpassantPossible
-        self.currentCastlingRights = tempCastleRights
-        
-        return moves
+        return packedMoves
+
+    def hasAnyLegalMove(self):
+        """
+        Determines if the current player has any legal move, without building the move list.
+        King moves are tried first, as they are the cheapest to find. Castling never needs checking:
+        if castling is legal, so is the king's step towards the rook.
+        Unlike getValidMoves, this leaves the checkMate and staleMate flags alone.
+        """
+        if self.whiteToMove:
+            kingSq = self.bb[5].bit_length() - 1
+            own = self.occWhite
+        else:
+            kingSq = self.bb[11].bit_length() - 1
+            own = self.occBlack
+        attacked = self.attackedSquares(not self.whiteToMove, self.occAll ^ (1 << kingSq))
+        if KING_ATTACKS[kingSq] & ~own & ~attacked:
+            return True
+
+        checkers = self.attackersTo(kingSq, not self.whiteToMove)
+        if checkers & (checkers - 1):
+            return False
+        if checkers:
+            allowed = checkers | BETWEEN[kingSq][checkers.bit_length() - 1]
+        else:
+            allowed = ~own
+        pinned, pinRays = self.getPins(kingSq)
+        packedMoves = []
+        self.getPieceMoves(packedMoves, allowed, pinned, pinRays)
+        return len(packedMoves) > 0
+
+    def unpackMove(self, packed):
+        """
+        Returns the Move object for a packed move.
+        A move is fully determined by the packed move and the pieces on its start and end squares,
+        so Move objects are built once and reused from MOVE_CACHE. Promotions are always built
+        fresh, as the player's promotionChoice is stored on the move.
+        """
+        start = packed & 63
+        end = (packed >> 6) & 63
+        key = packed | self.mailbox[start] << 14 | self.mailbox[end] << 22
+        move = MOVE_CACHE.get(key)
+        if move is None:
+            move = Move((start // 8, start % 8), (end // 8, end % 8), self.board,
+                        isEnPassantMove=bool(packed & EN_PASSANT_FLAG), isCastleMove=bool(packed & CASTLE_FLAG))
+            if not move.isPawnPromotion:
+                MOVE_CACHE[key] = move
+        return move
+
+    def leavesKingSafe(self, packed, kingSq):
+        """
+        Determines if the packed move leaves the current player's king (on kingSq) out of check.
+        Only the occupancy is updated for the test; the board itself is never touched.
+        """
+        start = packed & 63
+        end = (packed >> 6) & 63
+        startBit = 1 << start
+        captured = 1 << end
+        occupied = (self.occAll ^ startBit) | captured
+        if packed & EN_PASSANT_FLAG:
+            captured = 1 << (end + 8 if self.whiteToMove else end - 8)
+            occupied ^= captured
+        if startBit & (self.bb[5] | self.bb[11]):
+            kingSq = end
+        # A captured piece no longer attacks anything.
+        return not self.attackersTo(kingSq, not self.whiteToMove, occupied) & ~captured
+
+    def getPins(self, kingSq):
+        """
+        Finds the current player's pieces pinned to their king on kingSq.
+        Returns a bitboard of the pinned pieces and a dict mapping each pinned square to the
+        squares it may still move to: the line between king and pinner, plus the pinner itself.
+        """
+        bb = self.bb
+        if self.whiteToMove:
+            own = self.occWhite
+            bishops, rooks = bb[8] | bb[10], bb[9] | bb[10]
+        else:
+            own = self.occBlack
+            bishops, rooks = bb[2] | bb[4], bb[3] | bb[4]
+        # Enemy sliders that would hit the king on an empty board.
+        snipers = (ROOK_ATTACKS[kingSq][0] & rooks) | (BISHOP_ATTACKS[kingSq][0] & bishops)
+        pinned = 0
+        pinRays = {}
+        while snipers:
+            sniper = snipers & -snipers
+            snipers ^= sniper
+            line = BETWEEN[kingSq][sniper.bit_length() - 1]
+            blockers = self.occAll & line
+            # Pinned if exactly one piece stands in between and it is ours.
+            if blockers & own and not blockers & (blockers - 1):
+                pinned |= blockers
+                pinRays[blockers.bit_length() - 1] = line | sniper
+        return pinned, pinRays
 
     def inCheck(self):
         """
         Determines if the current player is in check.
         """
         if self.whiteToMove:
-            return self.SquareUnderAttack(self.whiteKingLocation[0], self.whiteKingLocation[1])
+            return self.attackersTo(self.bb[5].bit_length() - 1, False) != 0
         else:
-            return self.SquareUnderAttack(self.blackKingLocation[0], self.blackKingLocation[1])
+            return self.attackersTo(self.bb[11].bit_length() - 1, True) != 0
     
     def SquareUnderAttack(self, r, c):
         """
         Determines if the square (r, c) is attacked by any opponent piece.
         """
-        self.whiteToMove = not self.whiteToMove
-        oppMoves = self.getAllPossibleMovees()
-        self.whiteToMove = not self.whiteToMove
-        for move in oppMoves:
-            if move.endRow == r and move.endCol == c:
-                return True
-        return False        
+        return self.attackersTo(r * 8 + c, not self.whiteToMove) != 0
 
-    def getAllPossibleMovees(self):
+    def attackersTo(self, sq, byWhite, occupied=None):
         """
-        Generates all potential moves for the current player without check detection.
+        Returns a bitboard of the pieces of the given color that attack square sq.
+        Works backwards from sq: a knight on sq would reach exactly the squares knights attack it from,
+        a bishop or rook slid from sq stops on the first piece in each direction, and so on.
+        Sliders are blocked by occupied, which defaults to the current occupancy.
+        The attacking color is given explicitly, so the query never flips whiteToMove.
         """
-        moves = []
-        for r in range(len(self.board)):
-            for c in range(len(self.board[r])):
-                turn = self.board[r][c][0]
-                if (turn == 'w' and self.whiteToMove) or (turn == 'b' and not self.whiteToMove):
-                    piece = self.board[r][c][1]
-                    self.moveFunctions[piece](r, c, moves)
-        return moves
+        if occupied is None:
+            occupied = self.occAll
+        bb = self.bb
+        if byWhite:
+            pawns, knights, bishops, rooks, queens, king = bb[0], bb[1], bb[2], bb[3], bb[4], bb[5]
+            # White pawns attacking sq stand where a black pawn on sq would capture.
+            attackers = BLACK_PAWN_ATTACKS[sq] & pawns
+        else:
+            pawns, knights, bishops, rooks, queens, king = bb[6], bb[7], bb[8], bb[9], bb[10], bb[11]
+            attackers = WHITE_PAWN_ATTACKS[sq] & pawns
+        attackers |= KNIGHT_ATTACKS[sq] & knights
+        attackers |= KING_ATTACKS[sq] & king
+        if bishops | queens:
+            attackers |= BISHOP_ATTACKS[sq][occupied & BISHOP_MASKS[sq]] & (bishops | queens)
+        if rooks | queens:
+            attackers |= ROOK_ATTACKS[sq][occupied & ROOK_MASKS[sq]] & (rooks | queens)
+        return attackers
+
+    def attackedSquares(self, byWhite, occupied):
+        """
+        Returns a bitboard of every square attacked by the given color, with sliders blocked by occupied.
+        """
+        bb = self.bb
+        if byWhite:
+            pawns, knights, bishops, rooks, queens, king = bb[0], bb[1], bb[2], bb[3], bb[4], bb[5]
+            attacked = ((pawns >> 9) & ~FILE_H) | ((pawns >> 7) & ~FILE_A)
+        else:
+            pawns, knights, bishops, rooks, queens, king = bb[6], bb[7], bb[8], bb[9], bb[10], bb[11]
+            attacked = ((pawns << 7) & ~FILE_H) | ((pawns << 9) & ~FILE_A)
+        attacked |= KING_ATTACKS[king.bit_length() - 1]
+        while knights:
+            knight = knights & -knights
+            knights ^= knight
+            attacked |= KNIGHT_ATTACKS[knight.bit_length() - 1]
+        bishops |= queens
+        while bishops:
+            bishop = bishops & -bishops
+            bishops ^= bishop
+            sq = bishop.bit_length() - 1
+            attacked |= BISHOP_ATTACKS[sq][occupied & BISHOP_MASKS[sq]]
+        rooks |= queens
+        while rooks:
+            rook = rooks & -rooks
+            rooks ^= rook
+            sq = rook.bit_length() - 1
+            attacked |= ROOK_ATTACKS[sq][occupied & ROOK_MASKS[sq]]
+        return attacked
+
+    def getPieceMoves(self, moves, allowed, pinned, pinRays):
+        """
+        Generates the current player's legal moves for every piece except the king, as packed ints.
+        allowed holds the squares any piece may move to (everything not ours, or only the squares that
+        answer a check); pinned pieces are further restricted to their pin rays.
+        Pawns are generated for the whole side at once; other pieces square by square.
+        """
+        if self.whiteToMove:
+            pawns = self.bb[0]
+            pieces = self.occWhite ^ pawns ^ self.bb[5]
+            getPawnMoves = self.getWhitePawnMoves
+        else:
+            pawns = self.bb[6]
+            pieces = self.occBlack ^ pawns ^ self.bb[11]
+            getPawnMoves = self.getBlackPawnMoves
+        getPawnMoves(pawns & ~pinned, allowed, moves)
+        pinnedPawns = pawns & pinned
+        while pinnedPawns:
+            pawn = pinnedPawns & -pinnedPawns
+            pinnedPawns ^= pawn
+            getPawnMoves(pawn, allowed & pinRays[pawn.bit_length() - 1], moves)
+
+        # Visit only the squares holding our remaining pieces, taken off the occupancy bitboard.
+        mailbox = self.mailbox
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            sq = bit.bit_length() - 1
+            r, c = sq // 8, sq % 8
+            targets = allowed & pinRays[sq] if pinned & bit else allowed
+            # Dispatch on the piece type (code % 6: 1 knight, 2 bishop, 3 rook, 4 queen), most common first.
+            piece = mailbox[sq] % 6
+            if piece == 1:
+                self.getKnightMoves(r, c, moves, targets)
+            elif piece == 2:
+                self.getBishopMoves(r, c, moves, targets)
+            elif piece == 3:
+                self.getRookMoves(r, c, moves, targets)
+            else:
+                self.getQueenMoves(r, c, moves, targets)
+
+    def addMoves(self, start, targets, moves):
+        """
+        Adds a packed move from square start to every square set in the targets bitboard.
+        """
+        append = moves.append
+        while targets:
+            target = targets & -targets
+            targets ^= target
+            append(start | (target.bit_length() - 1) << 6)
+
+    def addPawnMoves(self, targets, offset, moves):
+        """
+        Adds a packed pawn move to every square set in the targets bitboard, from the square offset away from it.
+        """
+        append = moves.append
+        while targets:
+            target = targets & -targets
+            targets ^= target
+            end = target.bit_length() - 1
+            append((end + offset) | end << 6)
+
+    def addEnPassantMoves(self, epSq, pawns, moves):
+        """
+        Adds a packed en passant capture onto epSq for every pawn set in the pawns bitboard.
+        En passant removes two pieces from the capturer's rank, which the pin and check masks
+        don't account for, so each capture is tested directly.
+        """
+        kingSq = (self.bb[5] if self.whiteToMove else self.bb[11]).bit_length() - 1
+        while pawns:
+            pawn = pawns & -pawns
+            pawns ^= pawn
+            packed = (pawn.bit_length() - 1) | epSq << 6 | EN_PASSANT_FLAG
+            if self.leavesKingSafe(packed, kingSq):
+                moves.append(packed)
 
-    def getPawnMoves(self, r, c, moves):
+    def getWhitePawnMoves(self, pawns, allowed, moves):
         """
-        Adds valid pawn moves from position (r, c) including forward moves,
+        Adds valid moves for the given white pawns including forward moves,
         two-square advances from starting position, captures, and en passant.
+        Works on the whole pawn bitboard at once: shifting it by a row gives every pawn's push square,
+        and the file masks stop diagonal shifts from wrapping around the board edge.
         """
-        if self.whiteToMove:
-            # Single square advance.
-            if self.board[r - 1][c] == "--":
-                moves.append(Move((r, c), (r - 1, c), self.board))
-                # Two-square advance from starting row.
-                if r == 6 and self.board[r - 2][c] == "--":
-                    moves.append(Move((r, c), (r - 2, c), self.board))
-            # Capture left.
-            if c - 1 >= 0:
-                if self.board[r - 1][c - 1][0] == 'b':
-                    moves.append(Move((r, c), (r - 1, c - 1), self.board))
-                elif (r - 1, c - 1) == self.enpassantPossible:
-                    moves.append(Move((r, c), (r - 1, c - 1), self.board, isEnPassantMove=True))
-            # Capture right.
-            if c + 1 <= 7:
-                if self.board[r - 1][c + 1][0] == 'b':
-                    moves.append(Move((r, c), (r - 1, c + 1), self.board))
-                elif (r - 1, c + 1) == self.enpassantPossible:
-                    moves.append(Move((r, c), (r - 1, c + 1), self.board, isEnPassantMove=True))
-        else:
-            # Single square advance.
-            if self.board[r + 1][c] == "--":
-                moves.append(Move((r, c), (r + 1, c), self.board))
-                # Two-square advance from starting row.
-                if r == 1 and self.board[r + 2][c] == "--":
-                    moves.append(Move((r, c), (r + 2, c), self.board))
-            # Capture left.
-            if c - 1 >= 0:
-                if self.board[r + 1][c - 1][0] == 'w':
-                    moves.append(Move((r, c), (r + 1, c - 1), self.board))
-                elif (r + 1, c - 1) == self.enpassantPossible:
-                    moves.append(Move((r, c), (r + 1, c - 1), self.board, isEnPassantMove=True))
-            # Capture right.
-            if c + 1 <= 7:
-                if self.board[r + 1][c + 1][0] == 'w':
-                    moves.append(Move((r, c), (r + 1, c + 1), self.board))
-                elif (r + 1, c + 1) == self.enpassantPossible:
-                    moves.append(Move((r, c), (r + 1, c + 1), self.board, isEnPassantMove=True))
-
-    def getRookMoves(self, r, c, moves):
-        """
-        Generates all rook moves from (r, c) in straight lines until blocked.
-        """
-        directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        enemy_color = 'b' if self.whiteToMove else 'w'
-        
-        for dr, dc in directions:
-            temprow, tempcol = r + dr, c + dc
-            while 0 <= temprow < 8 and 0 <= tempcol < 8:
-                if self.board[temprow][tempcol][0] == self.board[r][c][0]:
-                    break
-                moves.append(Move((r, c), (temprow, tempcol), self.board))
-                if self.board[temprow][tempcol][0] == enemy_color:
-                    break
-                temprow += dr
-                tempcol += dc
-
-    def getKnightMoves(self, r, c, moves):
-        """
-        Generates all knight moves from (r, c) in an "L" shape.
-        """
-        offsets = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                   (1, -2), (1, 2), (2, -1), (2, 1)]
-        
-        ally_color = 'w' if self.whiteToMove else 'b'
-        for dr, dc in offsets:
-            new_r, new_c = r + dr, c + dc
-            if 0 <= new_r < 8 and 0 <= new_c < 8:
-                if self.board[new_r][new_c][0] != ally_color:
-                    moves.append(Move((r, c), (new_r, new_c), self.board))
+        addPawnMoves = self.addPawnMoves
+        empty = ~self.occAll
+        # Single square advances, then two-square advances of pawns that moved off the starting row.
+        pushes = (pawns >> 8) & empty
+        addPawnMoves(pushes & allowed, 8, moves)
+        addPawnMoves(((pushes & RANK_3) >> 8) & empty & allowed, 16, moves)
+        # Captures towards the lower and higher file.
+        enemies = self.occBlack & allowed
+        addPawnMoves((pawns >> 9) & ~FILE_H & enemies, 9, moves)
+        addPawnMoves((pawns >> 7) & ~FILE_A & enemies, 7, moves)
+        # En passant: the capturing pawns stand where a black pawn on the target square would attack.
+        epSq = self.enpassantSq
+        if epSq != NO_SQUARE:
+            self.addEnPassantMoves(epSq, BLACK_PAWN_ATTACKS[epSq] & pawns, moves)
 
-    def getBishopMoves(self, r, c, moves):
+    def getBlackPawnMoves(self, pawns, allowed, moves):
         """
-        Generates all diagonal moves for a bishop from (r, c) until blocked.
+        Adds valid moves for the given black pawns; the mirror image of getWhitePawnMoves.
         """
-        directions = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        enemy_color = 'b' if self.whiteToMove else 'w'
-        
-        for dr, dc in directions:
-            temprow, tempcol = r + dr, c + dc
-            while 0 <= temprow < 8 and 0 <= tempcol < 8:
-                if self.board[temprow][tempcol][0] == self.board[r][c][0]:
-                    break
-                moves.append(Move((r, c), (temprow, tempcol), self.board))
-                if self.board[temprow][tempcol][0] == enemy_color:
-                    break
-                temprow += dr
-                tempcol += dc
+        addPawnMoves = self.addPawnMoves
+        empty = ~self.occAll
+        pushes = (pawns << 8) & empty
+        addPawnMoves(pushes & allowed, -8, moves)
+        addPawnMoves(((pushes & RANK_6) << 8) & empty & allowed, -16, moves)
+        enemies = self.occWhite & allowed
+        addPawnMoves((pawns << 7) & ~FILE_H & enemies, -7, moves)
+        addPawnMoves((pawns << 9) & ~FILE_A & enemies, -9, moves)
+        epSq = self.enpassantSq
+        if epSq != NO_SQUARE:
+            self.addEnPassantMoves(epSq, WHITE_PAWN_ATTACKS[epSq] & pawns, moves)
 
-    def getQueenMoves(self, r, c, moves):
+    def getRookMoves(self, r, c, moves, allowed):
         """
-        Generates all queen moves by combining bishop and rook moves.
+        Generates all rook moves from (r, c) in straight lines until blocked, onto the allowed squares.
         """
-        self.getBishopMoves(r, c, moves)
-        self.getRookMoves(r, c, moves)
+        sq = r * 8 + c
+        self.addMoves(sq, ROOK_ATTACKS[sq][self.occAll & ROOK_MASKS[sq]] & allowed, moves)
 
-    def getKingMoves(self, r, c, moves):
+    def getKnightMoves(self, r, c, moves, allowed):
         """
-        Generates all king moves from (r, c), including one-square moves in any direction.
+        Generates all knight moves from (r, c) in an "L" shape, onto the allowed squares.
         """
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0),
-                      (1, 1), (-1, -1), (-1, 1), (1, -1)]
-        ally_color = 'w' if self.whiteToMove else 'b'
-        for dr, dc in directions:
-            new_r, new_c = r + dr, c + dc
-            if 0 <= new_r < 8 and 0 <= new_c < 8:
-                if self.board[new_r][new_c][0] != ally_color:
-                    moves.append(Move((r, c), (new_r, new_c), self.board))
+        sq = r * 8 + c
+        self.addMoves(sq, KNIGHT_ATTACKS[sq] & allowed, moves)
 
-    def getCastleMoves(self, r, c, moves):
+    def getBishopMoves(self, r, c, moves, allowed):
+        """
+        Generates all diagonal moves for a bishop from (r, c) until blocked, onto the allowed squares.
+        """
+        sq = r * 8 + c
+        self.addMoves(sq, BISHOP_ATTACKS[sq][self.occAll & BISHOP_MASKS[sq]] & allowed, moves)
+
+    def getQueenMoves(self, r, c, moves, allowed):
+        """
+        Generates all queen moves by combining bishop and rook moves, onto the allowed squares.
+        """
+        sq = r * 8 + c
+        attacks = ROOK_ATTACKS[sq][self.occAll & ROOK_MASKS[sq]] | BISHOP_ATTACKS[sq][self.occAll & BISHOP_MASKS[sq]]
+        self.addMoves(sq, attacks & allowed, moves)
+
+    def getKingMoves(self, r, c, moves, allowed):
+        """
+        Generates all king moves from (r, c), including one-square moves in any direction, onto the allowed squares.
+        """
+        sq = r * 8 + c
+        self.addMoves(sq, KING_ATTACKS[sq] & allowed, moves)
+
+    def getCastleMoves(self, r, c, moves, attacked):
         """
         Generates valid castling moves if the king is not in check
         and the path between king and rook is clear.
+        attacked is the bitboard of squares the opponent attacks.
         """
-        if self.SquareUnderAttack(r, c):
+        if self.whiteToMove:
+            kingSide, queenSide = self.castleRights & WKS, self.castleRights & WQS
+        else:
+            kingSide, queenSide = self.castleRights & BKS, self.castleRights & BQS
+        # Without rights there is nothing to probe; this is the usual case after the opening.
+        if not (kingSide or queenSide):
+            return
+        if attacked >> (r * 8 + c) & 1:
             return
-        if (self.whiteToMove and self.currentCastlingRights.wks) or (not self.whiteToMove and self.currentCastlingRights.bks):
-            self.kingSideCastleMoves(r, c, moves)
-        if (self.whiteToMove and self.currentCastlingRights.wqs) or (not self.whiteToMove and self.currentCastlingRights.bqs):
-            self.queenSideCastleMoves(r, c, moves)
+        if kingSide:
+            self.kingSideCastleMoves(r, c, moves, attacked)
+        if queenSide:
+            self.queenSideCastleMoves(r, c, moves, attacked)
     
-    def kingSideCastleMoves(self, r, c, moves):
+    def kingSideCastleMoves(self, r, c, moves, attacked):
         """
         Generates kingside castling moves if the squares between king and rook are clear
         and not attacked.
         """
-        if self.board[r][c+1] == "--" and self.board[r][c+2] == "--":
-            if not self.SquareUnderAttack(r, c+1) and not self.SquareUnderAttack(r, c+2):
-                moves.append(Move((r, c), (r, c+2), self.board, isCastleMove=True))
+        sq = r * 8 + c
+        if not self.occAll & ((1 << (sq + 1)) | (1 << (sq + 2))):
+            if not attacked & ((1 << (sq + 1)) | (1 << (sq + 2))):
+                moves.append(sq | (sq + 2) << 6 | CASTLE_FLAG)
 
-    def queenSideCastleMoves(self, r, c, moves):
+    def queenSideCastleMoves(self, r, c, moves, attacked):
         """
         Generates queenside castling moves if the squares between king and rook are clear
         and not attacked.
         """
-        if self.board[r][c-1] == "--" and self.board[r][c-2] == "--" and self.board[r][c-3] == "--":
-            if not self.SquareUnderAttack(r, c-1) and not self.SquareUnderAttack(r, c-2):
-                moves.append(Move((r, c), (r, c-2), self.board, isCastleMove=True))
-
-
-class CastlingRights():
-    def __init__(self, wks, bks, wqs, bqs):
-        """
-        Initializes castling rights.
-        
-        wks: White kingside castling available.
-        bks: Black kingside castling available.
-        wqs: White queenside castling available.
-        bqs: Black queenside castling available.
-        """
-        self.wks = wks
-        self.bks = bks
-        self.wqs = wqs
-        self.bqs = bqs
+        sq = r * 8 + c
+        if not self.occAll & ((1 << (sq - 1)) | (1 << (sq - 2)) | (1 << (sq - 3))):
+            if not attacked & ((1 << (sq - 1)) | (1 << (sq - 2))):
+                moves.append(sq | (sq - 2) << 6 | CASTLE_FLAG)
 
 
 class Move():
@@ -473,6 +846,11 @@ class Move():
     filesToCols = {"a": 0, "b": 1, "c": 2, "d": 3, "e": 4, "f": 5, "g": 6, "h": 7}
     colsToFiles = {v: k for k, v in filesToCols.items()}
 
+    # Fixed attributes instead of a per-instance dict: many moves are created and kept in the move log.
+    __slots__ = ('startRow', 'startCol', 'endRow', 'endCol', 'pieceMoved', 'pieceCaptured',
+                 'isEnPassantMove', 'isPawnPromotion', 'promotionChoice', 'isTwoPawnAdvance',
+                 'moveID', 'isCastleMove', 'orderKey')
+
     def __init__(self, startSq, endSq, board, promotionChoice=None, isEnPassantMove=False, isCastleMove=False):
         """
         Initializes a move.
@@ -502,10 +880,17 @@ class Move():
         else:
             self.promotionChoice = 'Q'
 
+        # A pawn moving two rows; makeMove opens the en passant square behind it.
+        self.isTwoPawnAdvance = self.pieceMoved[1] == 'p' and (self.startRow - self.endRow == 2 or self.endRow - self.startRow == 2)
+
         self.moveID = self.startRow * 1000 + self.startCol * 100 + self.endRow * 10 + self.endCol
 
         self.isCastleMove = isCastleMove
 
+        # The AI's move-ordering key, worked out the first time the move is ordered. It only depends on
+        # the attributes above, so it stays valid as the move is reused from MOVE_CACHE.
+        self.orderKey = None
+
     def __eq__(self, other):
         """
         Overrides equality to compare moves by their unique moveID.
@@ -514,6 +899,12 @@ class Move():
             return self.moveID == other.moveID
         return False
 
+    def __hash__(self):
+        """
+        Hashes moves by their moveID, consistent with __eq__, so they can be used in sets and as dict keys.
+        """
+        return self.moveID
+
     def getChessNotation(self):
         """
         Returns a simple chess notation for the move.
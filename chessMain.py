@@ -1,6 +1,9 @@
 import pygame as p
+import concurrent.futures
+import copy
 import os
 import sys
+import threading
 import chessEngine
 import moveAI
 
@@ -9,6 +12,24 @@ DIMENSION = 8
 SQ_SIZE = WIDTH // DIMENSION
 MAX_FPS = 15
 IMAGE = {}
+# The input event types the game reacts to; with REDRAW_EVENTS below, everything else is kept out of the queue.
+EVENT_TYPES = (p.QUIT, p.MOUSEBUTTONDOWN, p.KEYDOWN)
+# Window events after which the board must be drawn again, as its contents may have been lost.
+REDRAW_EVENTS = (p.VIDEOEXPOSE, p.WINDOWEXPOSED, p.WINDOWSHOWN, p.WINDOWRESTORED)
+# Timer event that ends the promotion menu with the default choice.
+PROMOTION_TIMEOUT = p.USEREVENT + 1
+# Top-left pixel of every square, indexed [row][col].
+_SQ_COORDS = [[(c * SQ_SIZE, r * SQ_SIZE) for c in range(DIMENSION)] for r in range(DIMENSION)]
+# The same positions indexed by square number r * 8 + c, matching GameState.mailbox.
+_SQ_COORDS_FLAT = [xy for row in _SQ_COORDS for xy in row]
+# Piece image for every mailbox code; None for empty squares and unused codes.
+_IMG_BY_CODE = [None] * 256
+# Light and dark square colors ("white" and "gray").
+_SQ_COLORS = ((255, 255, 255), (190, 190, 190))
+# (image, position) of every piece on the board, rebuilt only when the board changes.
+_PIECE_LIST = []
+# Rendered end-game messages: text -> (shadow surface, text surface, location).
+_TEXT_CACHE = {}
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for development and for PyInstaller .exe."""
@@ -21,14 +42,24 @@ def resource_path(relative_path):
 def loadImage():
     """
     Loads images for all chess pieces and scales them to fit the board squares.
+    Images already drawn at the square size in images/<SQ_SIZE>/ are used as they are;
+    otherwise the full-size image is scaled, smoothly when shrinking it by more than half.
     The images are stored in the global IMAGE dictionary for easy access.
+    They are converted to the display's pixel format, so the display must be created first.
     """
     pieces = ['wp', 'bp', 'wR', 'bR', 'bK', 'wK', 'bB', 'wB', 'wQ', 'bQ', 'wN', 'bN']
     for piece in pieces:
-        IMAGE[piece] = p.transform.scale(
-            p.image.load(resource_path("images/" + piece + ".png")),
-            (SQ_SIZE, SQ_SIZE)
-        )
+        sizedPath = resource_path("images/" + str(SQ_SIZE) + "/" + piece + ".png")
+        if os.path.exists(sizedPath):
+            image = p.image.load(sizedPath)
+        else:
+            image = p.image.load(resource_path("images/" + piece + ".png"))
+            if image.get_width() > 2 * SQ_SIZE:
+                image = p.transform.smoothscale(image, (SQ_SIZE, SQ_SIZE))
+            else:
+                image = p.transform.scale(image, (SQ_SIZE, SQ_SIZE))
+        IMAGE[piece] = image.convert_alpha()
+        _IMG_BY_CODE[chessEngine.PIECE_CODES[piece]] = IMAGE[piece]
 
 def showColorSelection(screen):
     """
@@ -50,7 +81,7 @@ def showColorSelection(screen):
     running_color_menu = True
     while running_color_menu:
         screen.blit(menu_bg, (0, 0))
-        for event in p.event.get():
+        for event in p.event.get(EVENT_TYPES):
             if event.type == p.QUIT:
                 p.quit()
                 sys.exit(0)
@@ -106,7 +137,7 @@ def showHomeScreen(screen):
         screen.blit(home_bg, (0, 0))
         screen.blit(title_surface, title_rect)
 
-        for event in p.event.get():
+        for event in p.event.get(EVENT_TYPES):
             if event.type == p.QUIT:
                 p.quit()
                 sys.exit(0)
@@ -133,13 +164,33 @@ def showHomeScreen(screen):
 
     return selected_mode
 
+def indexMoves(validMoves):
+    """
+    Indexes the valid moves for the UI. Returns a dict of moves keyed by
+    (startRow, startCol, endRow, endCol) for looking up clicked moves, and a dict mapping
+    each start square (row, col) to the pixel positions of its target squares for highlighting.
+    """
+    validMoveMap = {}
+    movesByOrigin = {}
+    for m in validMoves:
+        validMoveMap[(m.startRow, m.startCol, m.endRow, m.endCol)] = m
+        movesByOrigin.setdefault((m.startRow, m.startCol), []).append(_SQ_COORDS[m.endRow][m.endCol])
+    return validMoveMap, movesByOrigin
+
 def main():
     """
     Main function that initializes pygame, shows a home screen, and starts the chess game loop.
     """
     p.init()
+    p.event.set_blocked(None)
+    p.event.set_allowed(EVENT_TYPES + REDRAW_EVENTS + (PROMOTION_TIMEOUT,))
     screen = p.display.set_mode((WIDTH, HEIGHT))
+    buildBoardBackground()
+    buildHighlights()
+    loadFonts()
     clock = p.time.Clock()
+    # Animations keep their own clock so their 60 FPS pacing doesn't skew the main loop's.
+    animClock = p.time.Clock()
     screen.fill(p.Color("white"))
 
     # Show the home screen and get the selected game mode
@@ -163,7 +214,10 @@ def main():
 
     gs = chessEngine.GameState()
     validMoves = gs.getValidMoves()
+    validMoveMap, movesByOrigin = indexMoves(validMoves)
     loadImage()
+    buildPromotionMenus()
+    rebuildPieceList(gs.mailbox)
 
     moveMade = False
     animate = False
@@ -171,208 +225,340 @@ def main():
     sqSelected = ()
     playerClicks = []
     gameOver = False
+    dirty = True  # The screen needs to be redrawn.
+    # The AI searches in a worker thread; aiFuture is its pending move, if any, and setting
+    # aiStop makes that search give up.
+    aiExecutor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    aiFuture = None
+    aiStop = None
 
     while running:
         # Determine whose turn it is (human or AI)
         humanTurn = (gs.whiteToMove and playerOne) or (not gs.whiteToMove and playerTwo)
 
-        for e in p.event.get():
+        if dirty or not humanTurn:
+            events = p.event.get(EVENT_TYPES + REDRAW_EVENTS)
+        else:
+            # Nothing to draw and waiting for the player: block until an event arrives.
+            e = p.event.wait(1000 // MAX_FPS)
+            events = [e] + p.event.get(EVENT_TYPES + REDRAW_EVENTS) if e.type != p.NOEVENT else []
+
+        # Collect this frame's input first; only the last click and key of each kind is acted on.
+        pendingClick = None
+        pendingUndo = False
+        pendingReset = False
+        for e in events:
             if e.type == p.QUIT:
                 running = False
-
             elif e.type == p.MOUSEBUTTONDOWN:
-                if not gameOver and humanTurn:
-                    location = p.mouse.get_pos()
-                    col = location[0] // SQ_SIZE
-                    row = location[1] // SQ_SIZE
-                    if sqSelected == (row, col):
-                        sqSelected = ()
-                        playerClicks = []
-                    else:
-                        sqSelected = (row, col)
-                        playerClicks.append(sqSelected)
-                    if len(playerClicks) == 2:
-                        move = chessEngine.Move(playerClicks[0], playerClicks[1], gs.board)
-                        for i in range(len(validMoves)):
-                            if move == validMoves[i]:
-                                if move.isPawnPromotion:
-                                    promoteTo = askForPromotion(screen, gs.whiteToMove)
-                                    validMoves[i].promotionChoice = promoteTo
-                                gs.makeMove(validMoves[i])
-                                animate = True
-                                moveMade = True
-                                sqSelected = ()
-                                playerClicks = []
-                        if not moveMade:
-                            playerClicks = [sqSelected]
-
+                pendingClick = e.pos
             elif e.type == p.KEYDOWN:
                 if e.key == p.K_LEFT:  # Undo last move
-                    gs.undoMove()
-                    moveMade = True
-                    animate = False
-                    gameOver = False
+                    pendingUndo = True
                 if e.key == p.K_r:     # Reset the board
-                    gs = chessEngine.GameState()
-                    validMoves = gs.getValidMoves()
+                    pendingReset = True
+            elif e.type in REDRAW_EVENTS:
+                dirty = True
+
+        if pendingClick is not None:
+            dirty = True
+            if not gameOver and humanTurn:
+                col = pendingClick[0] // SQ_SIZE
+                row = pendingClick[1] // SQ_SIZE
+                if sqSelected == (row, col):
                     sqSelected = ()
                     playerClicks = []
-                    moveMade = False
-                    animate = False
-                    gameOver = False
-
-        # Handle AI move if it is AI's turn
-        if not gameOver and not humanTurn:
-            AIMove = moveAI.findBestMove(gs, validMoves)
-            if AIMove is None:
-                AIMove = moveAI.findRandomMove(validMoves)
-            gs.makeMove(AIMove)
+                else:
+                    sqSelected = (row, col)
+                    playerClicks.append(sqSelected)
+                if len(playerClicks) == 2:
+                    move = validMoveMap.get(playerClicks[0] + playerClicks[1])
+                    if move is not None:
+                        if move.isPawnPromotion:
+                            move.promotionChoice = askForPromotion(screen, gs.whiteToMove)
+                        gs.makeMove(move)
+                        animate = True
+                        moveMade = True
+                        sqSelected = ()
+                        playerClicks = []
+                    if not moveMade:
+                        playerClicks = [sqSelected]
+
+        if (pendingUndo or pendingReset) and aiFuture is not None:
+            # The position the AI is searching is going away; stop it and drop its answer.
+            aiStop.set()
+            aiFuture.cancel()
+            aiFuture = None
+        if pendingUndo:
+            dirty = True
+            gs.undoMove()
             moveMade = True
-            animate = True
+            animate = False
+            gameOver = False
+        if pendingReset:
+            dirty = True
+            gs = chessEngine.GameState()
+            validMoves = gs.getValidMoves()
+            validMoveMap, movesByOrigin = indexMoves(validMoves)
+            rebuildPieceList(gs.mailbox)
+            sqSelected = ()
+            playerClicks = []
+            moveMade = False
+            animate = False
+            gameOver = False
+
+        # Handle AI move if it is AI's turn. The search runs on a copy of the game in the
+        # worker thread, so events keep being handled while it thinks. After an undo or reset
+        # humanTurn and validMoves still describe the old position, so wait a frame for them.
+        if not gameOver and not humanTurn and not (pendingUndo or pendingReset):
+            if aiFuture is None:
+                aiStop = threading.Event()
+                aiFuture = aiExecutor.submit(moveAI.findBestMove, copy.deepcopy(gs), list(validMoves), aiStop)
+            elif aiFuture.done():
+                AIMove = aiFuture.result()
+                aiFuture = None
+                if AIMove is None:
+                    AIMove = moveAI.findRandomMove(validMoves)
+                gs.makeMove(AIMove)
+                moveMade = True
+                animate = True
 
         # If a move was made, update the valid moves list
         if moveMade:
+            rebuildPieceList(gs.mailbox)
             if animate:
-                animateMove(gs.movelog[-1], screen, gs.board, clock)
+                animateMove(gs.movelog[-1], screen, animClock)
             validMoves = gs.getValidMoves()
+            validMoveMap, movesByOrigin = indexMoves(validMoves)
             moveMade = False
             animate = False
-
-        drawGameState(screen, gs, validMoves, sqSelected)
-
-        # Check for checkmate or stalemate
-        if gs.checkMate:
-            gameOver = True
-            if gs.whiteToMove:
-                drawEndGameText(screen, "Black wins by Checkmate")
-            else:
-                drawEndGameText(screen, "White wins by Checkmate")
-        if gs.staleMate:
-            gameOver = True
-            drawEndGameText(screen, "Stalemate")
-
-        clock.tick(MAX_FPS)
-        p.display.flip()
+            dirty = True
+
+        # Only redraw when something changed.
+        if dirty:
+            drawGameState(screen, gs, movesByOrigin, sqSelected)
+
+            # Check for checkmate or stalemate
+            if gs.checkMate:
+                gameOver = True
+                if gs.whiteToMove:
+                    drawEndGameText(screen, "Black wins by Checkmate")
+                else:
+                    drawEndGameText(screen, "White wins by Checkmate")
+            if gs.staleMate:
+                gameOver = True
+                drawEndGameText(screen, "Stalemate")
+
+            p.display.flip()
+            dirty = False
+
+        # While the AI thinks the loop polls, so pace it; on a human's turn it blocks in event.wait.
+        if not humanTurn:
+            clock.tick(MAX_FPS)
+
+    if aiFuture is not None:
+        aiStop.set()
+        aiFuture.cancel()
+    aiExecutor.shutdown(wait=False)
 
 def askForPromotion(screen, isWhite):
     """
     Displays the promotion options when a pawn reaches the last rank.
     Returns the chosen piece notation as a string ('Q', 'R', 'B', 'N').
+    Sleeps until the player clicks or a timer ends the menu with the default 'Q' after 5 seconds.
     """
     pieces = ['Q', 'R', 'B', 'N']
-    pieceImages = [IMAGE[('w' if isWhite else 'b') + p] for p in pieces]
     optionWidth = WIDTH // 4
-    rectHeight = HEIGHT // 3
-    timeout = 5000  # 5 seconds
-    start_time = p.time.get_ticks()
+    p.time.set_timer(PROMOTION_TIMEOUT, 5000, 1)
+    screen.blit(_PROMO[isWhite], (0, HEIGHT // 3))
+    p.display.flip()
 
-    while True:
-        for event in p.event.get():
+    try:
+        while True:
+            event = p.event.wait()
             if event.type == p.QUIT:
                 p.quit()
                 sys.exit(0)
+            elif event.type == PROMOTION_TIMEOUT:
+                return 'Q'
             elif event.type == p.MOUSEBUTTONDOWN:
                 x, y = event.pos
                 idx = x // optionWidth
                 if 0 <= idx < 4:
                     return pieces[idx]
-        if p.time.get_ticks() - start_time > timeout:
-            return 'Q'
-        for i in range(4):
-            rect = p.Rect(i * optionWidth, HEIGHT // 3, optionWidth, rectHeight)
-            p.draw.rect(screen, p.Color("lightgray"), rect)
-            screen.blit(pieceImages[i], rect)
-        p.display.flip()
-
-def drawBoard(screen):
+            elif event.type in REDRAW_EVENTS:
+                # The window lost its contents; show the menu again over the board.
+                screen.blit(_PROMO[isWhite], (0, HEIGHT // 3))
+                p.display.flip()
+    finally:
+        # Stop the timer and drop a timeout that fired meanwhile, so it can't end the next menu.
+        p.time.set_timer(PROMOTION_TIMEOUT, 0)
+        p.event.clear(PROMOTION_TIMEOUT)
+
+def buildPromotionMenus():
     """
-    Draws the chessboard with alternating squares (light, dark).
+    Renders the promotion menu (Queen, Rook, Bishop, Knight on light gray) for each color once
+    into the global _PROMO dict, keyed by isWhite. Must be called after loadImage.
     """
-    global colors
-    colors = [p.Color("white"), p.Color("gray")]
+    global _PROMO
+    optionWidth = WIDTH // 4
+    rectHeight = HEIGHT // 3
+    _PROMO = {}
+    for isWhite in (True, False):
+        menu = p.Surface((WIDTH, rectHeight))
+        for i, piece in enumerate(['Q', 'R', 'B', 'N']):
+            rect = p.Rect(i * optionWidth, 0, optionWidth, rectHeight)
+            p.draw.rect(menu, p.Color("lightgray"), rect)
+            menu.blit(IMAGE[('w' if isWhite else 'b') + piece], rect)
+        _PROMO[isWhite] = menu.convert()
+
+def buildBoardBackground():
+    """
+    Renders the chessboard with alternating squares (light, dark) once into the global _BOARD_BG surface.
+    Must be called after the display is created, so the surface can be converted to its pixel format.
+    """
+    global _BOARD_BG
+    bg = p.Surface((WIDTH, HEIGHT))
     for r in range(DIMENSION):
         for c in range(DIMENSION):
-            color = colors[(r + c) % 2]
-            p.draw.rect(screen, color, p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
+            color = _SQ_COLORS[(r + c) & 1]
+            p.draw.rect(bg, color, p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
+    _BOARD_BG = bg.convert()
 
-def drawPieces(screen, board):
+def makeHighlight(color):
     """
-    Draws the chess pieces on the board according to their positions in 'board'.
+    Returns a semi-transparent square surface of the given color for highlighting squares.
+    The surface is opaque with a per-surface alpha rather than per-pixel alpha (no SRCALPHA),
+    which pygame blits onto the opaque screen with its fast surface-alpha blitter.
+    The alpha is set after convert(), which would otherwise drop it.
     """
-    for r in range(DIMENSION):
-        for c in range(DIMENSION):
-            piece = board[r][c]
-            if piece != '--':
-                screen.blit(IMAGE[piece], p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
+    surface = p.Surface((SQ_SIZE, SQ_SIZE))
+    surface.fill(p.Color(color))
+    surface = surface.convert()
+    surface.set_alpha(100)
+    return surface
+
+def buildHighlights():
+    """
+    Creates the highlight surfaces for the selected square and its valid moves once.
+    Must be called after the display is created.
+    """
+    global _BLUE_HL, _YELLOW_HL
+    _BLUE_HL = makeHighlight('blue')
+    _YELLOW_HL = makeHighlight('yellow')
+
+def loadFonts():
+    """
+    Creates the font used for the end-game text once, after pygame is initialized.
+    """
+    global _END_FONT
+    _END_FONT = p.font.SysFont("Helvetica", 48, True, False)
+
+def drawBoard(screen):
+    """
+    Draws the prerendered chessboard.
+    """
+    screen.blit(_BOARD_BG, (0, 0))
+
+def rebuildPieceList(mailbox):
+    """
+    Rebuilds the list of pieces drawn by drawPieces from the flat mailbox of piece codes
+    (GameState.mailbox). Must be called whenever the board changes.
+    """
+    _PIECE_LIST[:] = [(_IMG_BY_CODE[code], _SQ_COORDS_FLAT[sq])
+                      for sq, code in enumerate(mailbox) if code != chessEngine.EMPTY]
+
+def drawPieces(screen):
+    """
+    Draws the chess pieces collected by rebuildPieceList.
+    All pieces are submitted in a single batched blit call.
+    """
+    # fblits (pygame-ce) skips per-item argument parsing; stock pygame only has blits.
+    if hasattr(screen, 'fblits'):
+        screen.fblits(_PIECE_LIST)
+    else:
+        screen.blits(_PIECE_LIST, doreturn=False)
 
-def highlightSquares(screen, gs, validMoves, sqSelected):
+def highlightSquares(screen, gs, movesByOrigin, sqSelected):
     """
     Highlights the selected square and valid moves from that square.
     """
     if sqSelected != ():
         r, c = sqSelected
         if gs.board[r][c][0] == ('w' if gs.whiteToMove else 'b'):
-            blueSurface = p.Surface((SQ_SIZE, SQ_SIZE))
-            blueSurface.set_alpha(100)
-            blueSurface.fill(p.Color('blue'))
-            screen.blit(blueSurface, (c * SQ_SIZE, r * SQ_SIZE))
-
-            yellowSurface = p.Surface((SQ_SIZE, SQ_SIZE))
-            yellowSurface.set_alpha(100)
-            yellowSurface.fill(p.Color('yellow'))
-            for move in validMoves:
-                if move.startRow == r and move.startCol == c:
-                    screen.blit(yellowSurface, (move.endCol * SQ_SIZE, move.endRow * SQ_SIZE))
+            screen.blit(_BLUE_HL, _SQ_COORDS[r][c])
+            seq = [(_YELLOW_HL, pos) for pos in movesByOrigin.get(sqSelected, ())]
+            if hasattr(screen, 'fblits'):
+                screen.fblits(seq)
+            else:
+                screen.blits(seq, doreturn=False)
 
-def drawGameState(screen, gs, validMoves, sqSelected):
+def drawGameState(screen, gs, movesByOrigin, sqSelected):
     """
     Draws the board, highlights squares, and draws pieces.
     """
     drawBoard(screen)
-    highlightSquares(screen, gs, validMoves, sqSelected)
-    drawPieces(screen, gs.board)
+    highlightSquares(screen, gs, movesByOrigin, sqSelected)
+    drawPieces(screen)
 
-def animateMove(move, screen, board, clock):
+def animateMove(move, screen, clock):
     """
     Animates a piece moving on the board from start to end squares.
+    Positions are computed in whole pixels. The static part of the picture is drawn once
+    into an off-screen base; each frame only restores the square the moving piece left from
+    it, and only that square and the piece's new one are pushed to the display.
     """
-    global colors
     dR = move.endRow - move.startRow
     dC = move.endCol - move.startCol
     frames = (abs(dR) + abs(dC)) * 10
+    startX, startY = move.startCol * SQ_SIZE, move.startRow * SQ_SIZE
+    dX, dY = dC * SQ_SIZE, dR * SQ_SIZE
+
+    # Board and pieces as they stand after the move, minus the moving piece.
+    drawBoard(screen)
+    drawPieces(screen)
+    # Erase the piece from the ending square area
+    color = _SQ_COLORS[(move.endRow + move.endCol) & 1]
+    endSquare = p.Rect(move.endCol * SQ_SIZE, move.endRow * SQ_SIZE, SQ_SIZE, SQ_SIZE)
+    p.draw.rect(screen, color, endSquare)
+    if move.pieceCaptured != '--':
+        if move.isEnPassantMove:
+            epRow = (move.endRow + 1) if move.pieceCaptured[0] == 'b' else (move.endRow - 1)
+            endSquare = p.Rect(move.endCol * SQ_SIZE, epRow * SQ_SIZE, SQ_SIZE, SQ_SIZE)
+        screen.blit(IMAGE[move.pieceCaptured], endSquare)
+    base = screen.copy()
+
+    movingImage = IMAGE[move.pieceMoved]
+    movingRect = p.Rect(startX, startY, SQ_SIZE, SQ_SIZE)
+    prevRect = movingRect.copy()
 
     for frame in range(frames + 1):
-        r = move.startRow + dR * frame / frames
-        c = move.startCol + dC * frame / frames
-        drawBoard(screen)
-        drawPieces(screen, board)
-
-        # Erase the piece from the ending square area
-        color = colors[(move.endRow + move.endCol) % 2]
-        endSquare = p.Rect(move.endCol * SQ_SIZE, move.endRow * SQ_SIZE, SQ_SIZE, SQ_SIZE)
-        p.draw.rect(screen, color, endSquare)
-        if move.pieceCaptured != '--':
-            if move.isEnPassantMove:
-                epRow = (move.endRow + 1) if move.pieceCaptured[0] == 'b' else (move.endRow - 1)
-                endSquare = p.Rect(move.endCol * SQ_SIZE, epRow * SQ_SIZE, SQ_SIZE, SQ_SIZE)
-            screen.blit(IMAGE[move.pieceCaptured], endSquare)
-
-        screen.blit(IMAGE[move.pieceMoved], p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
-        p.display.flip()
+        movingRect.topleft = (startX + dX * frame // frames, startY + dY * frame // frames)
+        screen.blit(base, prevRect, prevRect)
+        screen.blit(movingImage, movingRect)
+        if frame == 0:
+            p.display.flip()
+        else:
+            p.display.update((prevRect, movingRect))
+        prevRect.topleft = movingRect.topleft
         clock.tick(60)
 
 def drawEndGameText(screen, text):
     """
     Displays the end-game text at the center of the screen.
+    Each message is rendered once and the surfaces are reused from _TEXT_CACHE.
     """
-    font = p.font.SysFont("Helvetica", 48, True, False)
-    textObject = font.render(text, 0, p.Color('Gray'))
-    textLocation = p.Rect(0, 0, WIDTH, HEIGHT).move(
-        WIDTH / 2 - textObject.get_width() / 2,
-        HEIGHT / 2 - textObject.get_height() / 2
-    )
-    screen.blit(textObject, textLocation)
-    textObject = font.render(text, 0, p.Color("Black"))
+    cached = _TEXT_CACHE.get(text)
+    if cached is None:
+        shadowObject = _END_FONT.render(text, 0, p.Color('Gray')).convert_alpha()
+        textObject = _END_FONT.render(text, 0, p.Color("Black")).convert_alpha()
+        textLocation = p.Rect(0, 0, WIDTH, HEIGHT).move(
+            WIDTH / 2 - textObject.get_width() / 2,
+            HEIGHT / 2 - textObject.get_height() / 2
+        )
+        cached = _TEXT_CACHE[text] = (shadowObject, textObject, textLocation)
+    shadowObject, textObject, textLocation = cached
+    screen.blit(shadowObject, textLocation)
     screen.blit(textObject, textLocation.move(2, 2))
 
 if __name__ == "__main__":
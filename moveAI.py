@@ -1,263 +1,335 @@
-import random
-
-# Material values
-pieceScore = {"K": 0, "Q": 10, "R": 5, "B": 3.3, "N": 3, "p": 1}
-
-# Piece-square tables
-pawnScore = [
-    [ 0, 0, 0, 0, 0, 0, 0, 0],
-    [ 5, 5, 5, -5, -5, 5, 5, 5],
-    [ 1, 1, 2, 3, 3, 2, 1, 1],
-    [ 0, 0, 0, 2, 2, 0, 0, 0],
-    [ 0, 0, 0, -2, -2, 0, 0, 0],
-    [ 1, -1, -2, 0, 0, -2, -1, 1],
-    [ 1, 2, 2, -2, -2, 2, 2, 1],
-    [ 0, 0, 0, 0, 0, 0, 0, 0]
-]
-
-knightScore = [
-    [-5, -4, -3, -3, -3, -3, -4, -5],
-    [-4, -2, 0, 1, 1, 0, -2, -4],
-    [-3, 1, 2, 3, 3, 2, 1, -3],
-    [-3, 0, 3, 4, 4, 3, 0, -3],
-    [-3, 1, 3, 4, 4, 3, 1, -3],
-    [-3, 0, 2, 3, 3, 2, 0, -3],
-    [-4, -2, 0, 0, 0, 0, -2, -4],
-    [-5, -4, -3, -3, -3, -3, -4, -5]
-]
-
-bishopScore = [
-    [-2, -1, -1, -1, -1, -1, -1, -2],
-    [-1, 0, 0, 0, 0, 0, 0, -1],
-    [-1, 0, 1, 1, 1, 1, 0, -1],
-    [-1, 1, 1, 1, 1, 1, 1, -1],
-    [-1, 0, 1, 1, 1, 1, 0, -1],
-    [-1, 1, 1, 1, 1, 1, 1, -1],
-    [-1, 1, 0, 0, 0, 0, 1, -1],
-    [-2, -1, -1, -1, -1, -1, -1, -2]
-]
-
-rookScore = [
-    [0, 0, 1, 2, 2, 1, 0, 0],
-    [-2, 0, 0, 0, 0, 0, 0, -2],
-    [-2, 0, 0, 0, 0, 0, 0, -2],
-    [-2, 0, 0, 0, 0, 0, 0, -2],
-    [-2, 0, 0, 0, 0, 0, 0, -2],
-    [-2, 0, 0, 0, 0, 0, 0, -2],
-    [2, 2, 2, 2, 2, 2, 2, 2],
-    [0, 0, 1, 2, 2, 1, 0, 0]
-]
-
-queenScore = [
-    [-2, -1, -1, 0, 0, -1, -1, -2],
-    [-1, 0, 0, 0, 0, 0, 0, -1],
-    [-1, 0, 1, 1, 1, 1, 0, -1],
-    [0, 0, 1, 1, 1, 1, 0, 0],
-    [0, 0, 1, 1, 1, 1, 0, 0],
-    [-1, 1, 1, 1, 1, 1, 0, -1],
-    [-1, 0, 1, 0, 0, 0, 0, -1],
-    [-2, -1, -1, 0, 0, -1, -1, -2]
-]
-
-kingScore = [
-    [-3, -4, -4, -5, -5, -4, -4, -3],
-    [-3, -4, -4, -5, -5, -4, -4, -3],
-    [-3, -4, -4, -5, -5, -4, -4, -3],
-    [-3, -4, -4, -5, -5, -4, -4, -3],
-    [-2, -3, -3, -4, -4, -3, -3, -2],
-    [-1, -2, -2, -2, -2, -2, -2, -1],
-    [2, 2, 0, 0, 0, 0, 2, 2],
-    [2, 3, 1, 0, 0, 1, 3, 2]
-]
-
-piecePositionScores = {
-    "p": pawnScore,
-    "N": knightScore,
-    "B": bishopScore,
-    "R": rookScore,
-    "Q": queenScore,
-    "K": kingScore
-}
-
-CHECKMATE = 1000
-STALEMATE = 0
-DEPTH = 3
-
-def findRandomMove(validMoves):
-    return validMoves[random.randint(0, len(validMoves) - 1)]
-
-def findBestMoveNonrecursive(gs, validMoves):
-    turnMultiplier = 1 if gs.whiteToMove else -1
-    opponentMinMaxScore = CHECKMATE
-    bestPlayerMove = None
-
-    random.shuffle(validMoves)
-    for playerMove in validMoves:
-        gs.makeMove(playerMove)
-        opponentMoves = gs.getValidMoves()
-
-        if gs.checkMate:
-            score = CHECKMATE
-        elif gs.staleMate:
-            score = STALEMATE
-        else:
-            opponentMaxScore = -CHECKMATE
-            for opponentMove in opponentMoves:
-                gs.makeMove(opponentMove)
-                gs.getValidMoves()
-                if gs.checkMate:
-                    score = CHECKMATE
-                elif gs.staleMate:
-                    score = STALEMATE
-                else:
-                    score = -turnMultiplier * scoreMaterial(gs.board)
-
-                if score > opponentMaxScore:
-                    opponentMaxScore = score
-
-                gs.undoMove()
-
-            score = opponentMaxScore
-
-        if score < opponentMinMaxScore:
-            opponentMinMaxScore = score
-            bestPlayerMove = playerMove
-
-        gs.undoMove()
-
-    return bestPlayerMove
-
-def findBestMove(gs, validMoves):
-    global nextMove, counter
-    nextMove = None
-    counter = 0
-    # findMoveNegaMax(gs, validMoves, DEPTH, 1 if gs.whiteToMove else -1)
-    findMoveNegaMaxAlphaBeta(gs, validMoves, DEPTH, -CHECKMATE, CHECKMATE, 1 if gs.whiteToMove else -1)
-    print(counter)
-    return nextMove
-
-def findMoveMinMax(gs, validMoves, depth, whiteToMove):
-    global nextMove
-    if depth == 0:
-        return scoreBoard(gs)
-    if whiteToMove:
-        maxScore = -CHECKMATE
-        for move in validMoves:
-            gs.makeMove(move)
-            nextMoves = gs.getValidMoves()
-            score = findMoveMinMax(gs, nextMoves, depth-1, False)
-            if score > maxScore:
-                maxScore =  score
-                if depth == DEPTH:
-                    nextMove = move
-            gs.undoMove()
-        return maxScore
-    
-    else:
-        minScore = CHECKMATE
-        for move in validMoves:
-            gs.makeMove(move)
-            nextMoves = gs.getValidMoves()
-            score = findMoveMinMax(gs, nextMoves, depth-1, True)
-            if score < minScore:
-                minScore = score
-                if depth == DEPTH:
-                    nextMove = move 
-            gs.undoMove()
-        return minScore
-
-def findMoveNegaMax(gs, validMoves, depth, turnMultiplier):
-    global nextMove, counter
-    counter += 1
-    if depth == 0:
-        return turnMultiplier * scoreBoard(gs)
-    
-    maxScore = -CHECKMATE
-    for move in validMoves:
-        gs.makeMove(move)
-        nextMoves = gs.getValidMoves()
-        score = -findMoveNegaMax(gs, nextMoves, depth-1, -turnMultiplier)
-        if score > maxScore:
-            maxScore = score
-            if depth == DEPTH:
-                nextMove = move
-        gs.undoMove()
-    return maxScore
-
-def findMoveNegaMaxAlphaBeta(gs, validMoves, depth, alpha, beta, turnMultiplier):
-    global nextMove, counter
-    counter += 1
-    if depth == 0:
-        return turnMultiplier * scoreBoard(gs)
-    
-    #move ordering for alpha Beta Pruning -- implement later
-    validMoves.sort(key=lambda move: -scoreMove(move, gs))
-
-
-    maxScore = -CHECKMATE
-    for move in validMoves:
-        gs.makeMove(move)
-        nextMoves = gs.getValidMoves()
-        score = -findMoveNegaMaxAlphaBeta(gs, nextMoves, depth-1, -beta, -alpha, -turnMultiplier)
-        if score > maxScore:
-            maxScore = score
-            if depth == DEPTH:
-                nextMove = move
-        gs.undoMove()
-        if maxScore > alpha: #pruning out bad cses
-            alpha = maxScore
-        if alpha >= beta:
-            break
-
-
-    return maxScore
-
-
-
-#score the board based on material
-#a pos score is good to move for night
-
-def scoreBoard(gs):
-    if gs.checkMate:
-        return -CHECKMATE if gs.whiteToMove else CHECKMATE
-    elif gs.staleMate:
-        return STALEMATE
-
-    score = 0
-    for row in range(len(gs.board)):
-        for col in range(len(gs.board[row])):
-            square = gs.board[row][col]
-            if square != "--":
-                pieceType = square[1]
-                isWhite = square[0] == 'w'
-                material = pieceScore[pieceType]
-                positionScore = 0
-                if pieceType in piecePositionScores:
-                    posTable = piecePositionScores[pieceType]
-                    positionScore = posTable[7 - row][col] if isWhite else posTable[row][col]
-                total = material + 0.01 * positionScore
-                score += total if isWhite else -total
-
-    return score
-
-# Material-only backup
-
-def scoreMaterial(board):
-    score = 0
-    for row in board:
-        for square in row:
-            if square != "--":
-                value = pieceScore[square[1]]
-                score += value if square[0] == 'w' else -value
-    return score
-
-def scoreMove(move, gs):
-    score = 0
-    if move.pieceCaptured != '--':
-        # MVV-LVA: More valuable victim, less valuable attacker
-        score += 10 * pieceScore[move.pieceCaptured[1]] - pieceScore[move.pieceMoved[1]]
-    if move.pieceMoved[1] == 'p' and move.endRow in [0, 7]:
-        score += 9  # promotion
-    if move.pieceMoved[1] == 'p' and move.startCol != move.endCol:
-        score += 2  # pawn capture
-    return score
+import random
+import threading
+from chessEngine import PIECES, EMPTY
+
+# Material values, in hundredths of a pawn so all scoring stays in integers
+pieceScore = {"K": 0, "Q": 1000, "R": 500, "B": 330, "N": 300, "p": 100}
+
+# Piece-square tables
+pawnScore = (
+    ( 0, 0, 0, 0, 0, 0, 0, 0),
+    ( 5, 5, 5, -5, -5, 5, 5, 5),
+    ( 1, 1, 2, 3, 3, 2, 1, 1),
+    ( 0, 0, 0, 2, 2, 0, 0, 0),
+    ( 0, 0, 0, -2, -2, 0, 0, 0),
+    ( 1, -1, -2, 0, 0, -2, -1, 1),
+    ( 1, 2, 2, -2, -2, 2, 2, 1),
+    ( 0, 0, 0, 0, 0, 0, 0, 0),
+)
+
+knightScore = (
+    (-5, -4, -3, -3, -3, -3, -4, -5),
+    (-4, -2, 0, 1, 1, 0, -2, -4),
+    (-3, 1, 2, 3, 3, 2, 1, -3),
+    (-3, 0, 3, 4, 4, 3, 0, -3),
+    (-3, 1, 3, 4, 4, 3, 1, -3),
+    (-3, 0, 2, 3, 3, 2, 0, -3),
+    (-4, -2, 0, 0, 0, 0, -2, -4),
+    (-5, -4, -3, -3, -3, -3, -4, -5),
+)
+
+bishopScore = (
+    (-2, -1, -1, -1, -1, -1, -1, -2),
+    (-1, 0, 0, 0, 0, 0, 0, -1),
+    (-1, 0, 1, 1, 1, 1, 0, -1),
+    (-1, 1, 1, 1, 1, 1, 1, -1),
+    (-1, 0, 1, 1, 1, 1, 0, -1),
+    (-1, 1, 1, 1, 1, 1, 1, -1),
+    (-1, 1, 0, 0, 0, 0, 1, -1),
+    (-2, -1, -1, -1, -1, -1, -1, -2),
+)
+
+rookScore = (
+    (0, 0, 1, 2, 2, 1, 0, 0),
+    (-2, 0, 0, 0, 0, 0, 0, -2),
+    (-2, 0, 0, 0, 0, 0, 0, -2),
+    (-2, 0, 0, 0, 0, 0, 0, -2),
+    (-2, 0, 0, 0, 0, 0, 0, -2),
+    (-2, 0, 0, 0, 0, 0, 0, -2),
+    (2, 2, 2, 2, 2, 2, 2, 2),
+    (0, 0, 1, 2, 2, 1, 0, 0),
+)
+
+queenScore = (
+    (-2, -1, -1, 0, 0, -1, -1, -2),
+    (-1, 0, 0, 0, 0, 0, 0, -1),
+    (-1, 0, 1, 1, 1, 1, 0, -1),
+    (0, 0, 1, 1, 1, 1, 0, 0),
+    (0, 0, 1, 1, 1, 1, 0, 0),
+    (-1, 1, 1, 1, 1, 1, 0, -1),
+    (-1, 0, 1, 0, 0, 0, 0, -1),
+    (-2, -1, -1, 0, 0, -1, -1, -2),
+)
+
+kingScore = (
+    (-3, -4, -4, -5, -5, -4, -4, -3),
+    (-3, -4, -4, -5, -5, -4, -4, -3),
+    (-3, -4, -4, -5, -5, -4, -4, -3),
+    (-3, -4, -4, -5, -5, -4, -4, -3),
+    (-2, -3, -3, -4, -4, -3, -3, -2),
+    (-1, -2, -2, -2, -2, -2, -2, -1),
+    (2, 2, 0, 0, 0, 0, 2, 2),
+    (2, 3, 1, 0, 0, 1, 3, 2),
+)
+
+piecePositionScores = {
+    "p": pawnScore,
+    "N": knightScore,
+    "B": bishopScore,
+    "R": rookScore,
+    "Q": queenScore,
+    "K": kingScore
+}
+
+# Material and position folded into one table per piece type: the value of that piece standing on
+# each square (from White's side of the board), so scoreBoard needs a single lookup per piece.
+# Flattened to 64 entries indexed by row * 8 + col, like the engine's mailbox.
+pieceSquareValues = {
+    pieceType: tuple(pieceScore[pieceType] + positionScore for row in table for positionScore in row)
+    for pieceType, table in piecePositionScores.items()
+}
+# The same tables for each coloured piece, keyed like the board: White's rows flipped to its side of the
+# board and Black's values negated, so scoreBoard adds the entry for any piece without checking its colour.
+pieceSquareScores = {}
+for pieceType, table in pieceSquareValues.items():
+    pieceSquareScores['w' + pieceType] = tuple(table[sq ^ 56] for sq in range(64))
+    pieceSquareScores['b' + pieceType] = tuple(-value for value in table)
+# And indexed by the engine's integer piece codes, as stored in gs.mailbox.
+PSQT = tuple(pieceSquareScores[piece] for piece in PIECES)
+
+CHECKMATE = 100000
+STALEMATE = 0
+DEPTH = 2
+
+# Transposition table: Zobrist hash of a position -> (depth, score, flag, best move) from an earlier search of it.
+# The flag tells whether the score is exact or only a lower or upper bound, after an alpha-beta cutoff.
+EXACT = 0
+LOWERBOUND = 1
+UPPERBOUND = 2
+transpositionTable = {}
+
+# Killer moves: the last two quiet moves that caused a beta cutoff at each ply, tried early at that ply
+# in sibling positions. History: (piece, end square) -> sum of depth squared over the quiet cutoffs it made.
+KILLER_BONUS = 800
+killers = [[None, None] for _ in range(DEPTH + 4)]
+history = {}
+
+def findRandomMove(validMoves):
+    return validMoves[random.randint(0, len(validMoves) - 1)]
+
+def findBestMoveNonrecursive(gs, validMoves):
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    opponentMinMaxScore = CHECKMATE
+    bestPlayerMove = None
+
+    random.shuffle(validMoves)
+    for playerMove in validMoves:
+        gs.makeMove(playerMove)
+        opponentMoves = gs.getValidMoves()
+
+        if gs.checkMate:
+            score = CHECKMATE
+        elif gs.staleMate:
+            score = STALEMATE
+        else:
+            opponentMaxScore = -CHECKMATE
+            for opponentMove in opponentMoves:
+                gs.makeMove(opponentMove)
+                # Nothing is searched below here, so only whether a move exists matters.
+                if gs.hasAnyLegalMove():
+                    score = -turnMultiplier * scoreMaterial(gs.board)
+                elif gs.inCheck():
+                    score = CHECKMATE
+                else:
+                    score = STALEMATE
+
+                if score > opponentMaxScore:
+                    opponentMaxScore = score
+
+                gs.undoMove()
+
+            score = opponentMaxScore
+
+        if score < opponentMinMaxScore:
+            opponentMinMaxScore = score
+            bestPlayerMove = playerMove
+
+        gs.undoMove()
+
+    return bestPlayerMove
+
+# Raised inside the search once its stop event is set, to unwind it at once.
+class SearchStopped(Exception):
+    pass
+
+# stopEvent (a threading.Event) can be set from another thread to abandon the search, which then returns None.
+def findBestMove(gs, validMoves, stopEvent=None):
+    if stopEvent is None:
+        stopEvent = threading.Event()
+    bestMove = None
+    transpositionTable.clear()
+    for killerMoves in killers:
+        killerMoves[0] = killerMoves[1] = None
+    history.clear()
+    # Iterative deepening: each shallower search leaves its best moves in the transposition
+    # table, where the next, deeper search picks them up to try first.
+    try:
+        for depth in range(1, DEPTH + 1):
+            score, move = findMoveNegaMaxAlphaBeta(gs, validMoves, depth, 0, -CHECKMATE, CHECKMATE,
+                                                   1 if gs.whiteToMove else -1, stopEvent)
+            if move is not None:
+                bestMove = move
+    except SearchStopped:
+        # gs is left part-way through the search; the caller is discarding it.
+        return None
+    return bestMove
+
+# Returns (score, best move) for the side to move. ply counts moves from the root.
+# Raises SearchStopped once stopEvent is set.
+def findMoveNegaMaxAlphaBeta(gs, validMoves, depth, ply, alpha, beta, turnMultiplier, stopEvent):
+    if depth == 0:
+        return quiesce(gs, validMoves, alpha, beta, turnMultiplier), None
+    if stopEvent.is_set():
+        raise SearchStopped
+    makeMove, undoMove = gs.makeMove, gs.undoMove
+    # The last ply hands its positions to quiesce, which only plays captures and promotions.
+    getNextMoves = gs.getLoudMoves if depth == 1 else gs.getValidMoves
+    search = findMoveNegaMaxAlphaBeta
+    checkmate = CHECKMATE
+
+    # Reuse an earlier search of this position if it went at least as deep.
+    # The root always searches, as it has to pick the move to play.
+    positionHash = gs.zobrist
+    alphaOrig = alpha
+    entry = transpositionTable.get(positionHash)
+    if entry is not None and entry[0] >= depth and ply != 0:
+        entryScore, entryFlag = entry[1], entry[2]
+        if entryFlag == EXACT:
+            return entryScore, entry[3]
+        elif entryFlag == LOWERBOUND:
+            alpha = max(alpha, entryScore)
+        else:
+            beta = min(beta, entryScore)
+        if alpha >= beta:
+            return entryScore, entry[3]
+
+    # Move ordering for alpha beta pruning: _moveOrderKey plus the killer and history bonuses, with the best
+    # move found last time first. Each move is scored once, and the loop picks the best remaining one
+    # as it goes rather than sorting up front, as a cutoff usually comes after the first few.
+    killerMoves = killers[ply]
+    ttMove = entry[3] if entry is not None else None
+    orderKeys = [-checkmate if move == ttMove else
+                 _moveOrderKey(move)
+                 - (KILLER_BONUS if move in killerMoves else 0)
+                 - history.get((move.pieceMoved, move.endRow * 8 + move.endCol), 0)
+                 for move in validMoves]
+
+    maxScore = -checkmate
+    bestMove = None
+    for i in range(len(validMoves)):
+        best = min(range(i, len(validMoves)), key=orderKeys.__getitem__)
+        if best != i:
+            validMoves[i], validMoves[best] = validMoves[best], validMoves[i]
+            orderKeys[i], orderKeys[best] = orderKeys[best], orderKeys[i]
+        move = validMoves[i]
+        makeMove(move)
+        nextMoves = getNextMoves()
+        score = -search(gs, nextMoves, depth-1, ply+1, -beta, -alpha, -turnMultiplier, stopEvent)[0]
+        if score > maxScore:
+            maxScore = score
+            bestMove = move
+        undoMove()
+        if maxScore > alpha: #pruning out bad cses
+            alpha = maxScore
+        if alpha >= beta:
+            if move.pieceCaptured == '--' and not move.isPawnPromotion:
+                if killerMoves[0] != move:
+                    killerMoves[1] = killerMoves[0]
+                    killerMoves[0] = move
+                historyKey = (move.pieceMoved, move.endRow * 8 + move.endCol)
+                history[historyKey] = history.get(historyKey, 0) + depth * depth
+            break
+
+    if maxScore <= alphaOrig:
+        flag = UPPERBOUND
+    elif maxScore >= beta:
+        flag = LOWERBOUND
+    else:
+        flag = EXACT
+    transpositionTable[positionHash] = (depth, maxScore, flag, bestMove)
+
+    return maxScore, bestMove
+
+# Quiescence search: past the depth limit keep playing out captures and promotions, so a position is
+# never scored halfway through an exchange. The side to move may also "stand pat" on the static score.
+# loudMoves are the position's captures and promotions, from gs.getLoudMoves.
+def quiesce(gs, loudMoves, alpha, beta, turnMultiplier):
+    maxScore = turnMultiplier * scoreBoard(gs)
+    if maxScore >= beta:
+        return maxScore
+    if maxScore > alpha:
+        alpha = maxScore
+
+    loudMoves.sort(key=_moveOrderKey)
+    makeMove, undoMove, getLoudMoves = gs.makeMove, gs.undoMove, gs.getLoudMoves
+    for move in loudMoves:
+        makeMove(move)
+        score = -quiesce(gs, getLoudMoves(), -beta, -alpha, -turnMultiplier)
+        undoMove()
+        if score > maxScore:
+            maxScore = score
+            if maxScore > alpha:
+                alpha = maxScore
+                if alpha >= beta:
+                    break
+
+    return maxScore
+
+
+
+#score the board based on material
+#a pos score is good to move for night
+
+def scoreBoard(gs, EMPTY=EMPTY, PSQT=PSQT):
+    if gs.checkMate:
+        return -CHECKMATE if gs.whiteToMove else CHECKMATE
+    elif gs.staleMate:
+        return STALEMATE
+
+    # One pass over the engine's flat mailbox.
+    score = 0
+    for sq, code in enumerate(gs.mailbox):
+        if code != EMPTY:
+            score += PSQT[code][sq]
+
+    return score
+
+# Material-only backup
+
+def scoreMaterial(board):
+    score = 0
+    for row in board:
+        for square in row:
+            if square != "--":
+                value = pieceScore[square[1]]
+                score += value if square[0] == 'w' else -value
+    return score
+
+# Sort key for move ordering: the move's promise (MVV-LVA captures, promotions) negated, so the best moves sort first.
+# Only looks at the move itself, so it can be passed to sort() directly, and is
+# remembered on the move so each Move object is scored once.
+def _moveOrderKey(move, pieceScore=pieceScore):
+    if move.orderKey is not None:
+        return move.orderKey
+    score = 0
+    pieceMoved = move.pieceMoved[1]
+    if move.pieceCaptured != '--':
+        # MVV-LVA: More valuable victim, less valuable attacker
+        score += 10 * pieceScore[move.pieceCaptured[1]] - pieceScore[pieceMoved]
+    if pieceMoved == 'p':
+        if move.endRow == 0 or move.endRow == 7:
+            score += 900  # promotion
+        if move.startCol != move.endCol:
+            score += 200  # pawn capture
+    move.orderKey = -score
+    return -score